@@ -121,7 +121,8 @@ void getRPM_ref(){
 
 void sendRPM_mes(){
   if(request && Serial.available()==0){
-    Serial.print(String(leftUp.speed_mes, 2) + "," + String(rightUp.speed_mes, 2) + "," + String(leftDist) + "," + String(leftDist) + "\n");
+    // Four wheel speeds (leftUp, rightUp, leftDw, rightDw) then the obstacle distances
+    Serial.print(String(leftUp.speed_mes, 2) + "," + String(rightUp.speed_mes, 2) + "," + String(leftDw.speed_mes, 2) + "," + String(rightDw.speed_mes, 2) + "," + String(leftDist) + "," + String(leftDist) + "\n");
     request = false;
   }
 }
@@ -0,0 +1,214 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+from os import path
+here = path.dirname(path.abspath(__file__))
+sys.path.insert(0, path.join(here, "..", "Task"))
+sys.path.insert(0, path.join(here, ".."))
+sys.path.insert(0, path.join(here, "stubs"))	# sense_hat, serial and picamera off-hardware
+
+# Requirements
+import argparse
+import json
+import logging
+import platform
+import shutil
+import tempfile
+from time import time, strftime
+
+def Measure(call, number, ticks = 1, repeat = 5):
+	# Best and median per-tick cost over 'repeat' runs of 'number' calls of 'ticks' ticks,
+	# after one untimed run to warm up caches and the CPU clock
+	costs = []
+	for r in range(repeat + 1):
+		start_time = time()
+		for k in range(number):
+			call()
+		if r > 0:
+			costs.append((time() - start_time)/(number*ticks))
+	costs.sort()
+	return costs[0], costs[len(costs)//2]
+
+
+# Hot paths run on the rover at every tick (0.1 s), each returns (call, number[, ticks])
+# and may add a function to 'cleanup', called once the benchmarks are done
+cleanup = []
+
+
+def PID():
+	from controller import Corrector
+	corrector = Corrector(P = 100.0/3.14, I = 0.5, D = 2.0, init_error = 0.0, wind_Up = True)
+	return lambda: corrector.PID(0.12, 0.1), 20000
+
+
+def Reset():
+	from controller import Reset
+	return lambda: Reset(4.0), 50000
+
+
+def Prediction():
+	from filter import Filter
+	kalman = Filter()
+	return lambda: kalman.Prediction(15.0, 14.0), 5000
+
+
+def Update():
+	from filter import Filter
+	kalman = Filter()
+	kalman.Prediction(15.0, 14.0)
+	return kalman.Update, 5000
+
+
+def Uart():
+	from uart import Arduino
+	arduino = Arduino(period = 0.0)
+	return arduino.getDatas, 20000
+
+
+def Guidance():
+	# FSM ticks: Timer is replaced so that Guidance loops 'ticks' times without sleeping
+	import rover
+	rover_ = rover.Rover()
+	logging.getLogger().setLevel(logging.WARNING)
+	ticks = 2000
+
+	def Ticks():
+		count = [0]
+		def Timer(period, start_time):
+			count[0] += 1
+			if count[0] >= ticks:
+				rover_.exit = True
+		rover_.exit = False
+		rover_.fsm = 'GoTo'
+		rover_.ready['navigation'].set()
+		rover_.ready['control'].set()
+		rover.Timer, Timer_ = Timer, rover.Timer
+		try:
+			rover_.Guidance()
+		finally:
+			rover.Timer = Timer_
+	return Ticks, 1, ticks
+
+
+def Slip():
+	from slip import Slip
+	detector = Slip(0.045, 0.750)
+	wheels = [15.0, 15.2, 14.9, 18.0]
+	def Tick():
+		detector.Update(wheels, 0.05)
+		detector.Odometry(wheels)
+	return Tick, 5000
+
+
+def Telemetry():
+	from telemetry import Writer, NAVIGATION
+	folder = tempfile.mkdtemp()
+	log = Writer(path.join(folder, 'bench.log'), NAVIGATION)
+	cleanup.append(log.Close)
+	cleanup.append(lambda: shutil.rmtree(folder))
+	row = [0.1]*len(NAVIGATION)
+	return lambda: log.Append(*row), 20000
+
+
+def Vision(frames = None):
+	import cv2
+	from vision import Threshold, Detector
+	from bench_vision import Load, Synthetic
+	images = Load(frames) if frames else Synthetic(5)
+	detector = Detector(images[0].shape[1], images[0].shape[0])
+	state = [0]
+	def Frame():
+		img = images[state[0] % len(images)]
+		state[0] += 1
+		detector.Detect(Threshold(img))
+	return Frame, 5*len(images)
+
+
+BENCHMARKS = [	('controller.Corrector.PID', PID),
+		('controller.Reset', Reset),
+		('filter.Filter.Prediction', Prediction),
+		('filter.Filter.Update', Update),
+		('uart.Arduino.getDatas', Uart),
+		('rover.Guidance tick', Guidance),
+		('slip.Slip tick', Slip),
+		('telemetry.Writer.Append', Telemetry),
+		('vision frame', Vision)]
+
+
+def Baseline(history, name, window):
+	# Median of the last 'window' runs of this machine that measured 'name'
+	values = [run['results'][name] for run in history if name in run['results'] and run['host'] == platform.node()
+			and run['python'] == platform.python_version()][-window:]
+	if not values:
+		return None
+	values.sort()
+	return values[len(values)//2]
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = "Microbenchmarks of the Rpi_Software hot paths")
+	parser.add_argument('--history', default = path.join(here, 'history.json'), help = "JSON file of the previous runs")
+	parser.add_argument('--threshold', type = float, default = 0.20, help = "relative slowdown flagged as a regression")
+	parser.add_argument('--window', type = int, default = 5, help = "previous runs used as the baseline")
+	parser.add_argument('--repeat', type = int, default = 5, help = "runs of each benchmark, the best one is kept")
+	parser.add_argument('--frames', help = "folder of recorded frames for the vision benchmark")
+	parser.add_argument('--only', help = "run the benchmarks whose name contains this text")
+	parser.add_argument('--no-save', dest = 'save', action = 'store_false', help = "do not add this run to the history")
+	args = parser.parse_args()
+
+	history = []
+	if path.exists(args.history):
+		fichier = open(args.history, 'r')
+		history = json.load(fichier)['runs']
+		fichier.close()
+
+	results = {}
+	regressions = []
+	print("%-28s %12s %12s %12s %8s" % ("benchmark", "best (us)", "median (us)", "baseline", "change"))
+	try:
+		for name, bench in BENCHMARKS:
+			if args.only and args.only not in name:
+				continue
+			try:
+				spec = bench(args.frames) if bench is Vision else bench()
+			except ImportError as error:
+				print("%-28s skipped (%s)" % (name, error))
+				continue
+			best, median = Measure(*spec, repeat = args.repeat)
+			results[name] = best
+
+			baseline = Baseline(history, name, args.window)
+			if baseline is None:
+				print("%-28s %12.2f %12.2f %12s %8s" % (name, best*1e6, median*1e6, "-", "-"))
+				continue
+			change = best/baseline - 1.0
+			flag = ""
+			if change > args.threshold:
+				# Confirm with a longer run before flagging, one slow sample is often noise
+				best_, median = Measure(*spec, repeat = 4*args.repeat)
+				best = min(best, best_)
+				results[name] = best
+				change = best/baseline - 1.0
+				flag = "  (re-run)"
+			if change > args.threshold:
+				flag = "  REGRESSION"
+				regressions.append(name)
+			print("%-28s %12.2f %12.2f %12.2f %+7.1f%%%s" % (name, best*1e6, median*1e6, baseline*1e6, change*100, flag))
+	finally:
+		for function in cleanup:
+			function()
+
+	# A run with regressions is not saved, it would pull the baseline up
+	if args.save and results and not regressions:
+		history.append({'time': strftime("%Y-%m-%d %H:%M:%S"),
+				'host': platform.node(),
+				'python': platform.python_version(),
+				'results': results})
+		fichier = open(args.history, 'w')
+		json.dump({'runs': history}, fichier, indent = 1, sort_keys = True)
+		fichier.close()
+
+	if regressions:
+		print("%d regression(s) above %.0f %%: %s, run not saved" % (len(regressions), args.threshold*100, ', '.join(regressions)))
+		sys.exit(1)
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "Task"))
+
+# Requirements
+import argparse
+import numpy as np
+from math import cos, sin, pi, hypot
+from time import time
+
+# Functions
+from controller import Reset
+from plant import Plant
+from slip import Slip, THRESHOLD
+
+
+# Slip ratios of the sweep, a ratio s makes the wheel turn 1/(1-s) times faster than it drives
+SLIPS = [0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5]
+
+
+def Run(duration = 30.0, wheel = 0, slip = 0.4, start = 10.0, end = 20.0, threshold = THRESHOLD, seed = 0):
+	# Drives the simulated plant with one wheel slipping between 'start' and 'end' (s)
+	plant = Plant(seed = seed)
+	detector = Slip(plant.R, plant.L, threshold = threshold)
+	dt = plant.dt
+	convert = 2*pi/60.0
+
+	# Odometry poses: two up wheels (previous Navigation) and slip weighted
+	naive = [0.0, 0.0, 0.0]
+	weighted = [0.0, 0.0, 0.0]
+	cost = []
+	detected = 0
+	false_alarms = 0
+
+	for k in range(int(duration/dt)):
+		t = k*dt
+		plant.slip[:] = 0.0
+		if start <= t < end:
+			plant.slip[wheel] = slip
+		wheels, gyro = plant.Step(15.0, 15.0 + 2.0*sin(0.2*t))
+
+		# Previous odometry, leftUp and rightUp only
+		d = plant.R*dt*(wheels[1] + wheels[0])*0.5*convert
+		naive[2] = Reset(naive[2] + plant.R*dt*convert*(wheels[1] - wheels[0])/plant.L)
+		naive[0] += d*cos(naive[2])
+		naive[1] += d*sin(naive[2])
+
+		# Slip stage, timed as in Rover.Navigation
+		start_time = time()
+		detector.Update(wheels, gyro)
+		omega_righ, omega_left = detector.Odometry(wheels)
+		cost.append(time() - start_time)
+
+		d = plant.R*dt*(omega_righ + omega_left)*0.5*convert
+		if detector.slipping.any():
+			weighted[2] = Reset(weighted[2] + dt*gyro)
+		else:
+			weighted[2] = Reset(weighted[2] + plant.R*dt*convert*(omega_righ - omega_left)/plant.L)
+		weighted[0] += d*cos(weighted[2])
+		weighted[1] += d*sin(weighted[2])
+
+		if start + 1.0 <= t < end:
+			detected += int(detector.slipping[wheel])
+		if t < start or t >= end + 1.0:
+			false_alarms += int(detector.slipping.any())
+
+	error_naive = hypot(naive[0] - plant.X, naive[1] - plant.Y)
+	error_weighted = hypot(weighted[0] - plant.X, weighted[1] - plant.Y)
+	return error_naive, error_weighted, detected/((end - start - 1.0)/dt), false_alarms, np.array(cost)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = "Slip detection on the simulated plant")
+	parser.add_argument('--wheel', type = int, default = 0, help = "slipping wheel (0 leftUp, 1 rightUp, 2 leftDw, 3 rightDw)")
+	parser.add_argument('--slip', type = float, help = "slip ratio, a sweep over all the wheels and several ratios when not given")
+	parser.add_argument('--threshold', type = float, default = THRESHOLD, help = "slip.Slip detection threshold")
+	args = parser.parse_args()
+
+	if args.slip is None:
+		# Detection rate of each ratio over the four wheels and several noise seeds
+		seeds = range(5)
+		print("threshold %.2f, %d runs per ratio" % (args.threshold, 4*len(seeds)))
+		print("%-10s %10s %14s %14s %14s" % ("slip", "detected", "false alarms", "error 2 wheels", "error weighted"))
+		for slip in SLIPS:
+			runs = [Run(wheel = wheel, slip = slip, threshold = args.threshold, seed = seed) for wheel in range(4) for seed in seeds]
+			print("%-10.2f %9.0f %% %8.1f ticks %12.3f m %12.3f m" % (slip, 100*np.mean([run[2] for run in runs]), np.mean([run[3] for run in runs]),
+				np.mean([run[0] for run in runs]), np.mean([run[1] for run in runs])))
+		sys.exit(0)
+
+	error_naive, error_weighted, detection, false_alarms, cost = Run(wheel = args.wheel, slip = args.slip, threshold = args.threshold)
+	print("%-24s %.3f m" % ("position error, 2 wheels", error_naive))
+	print("%-24s %.3f m" % ("position error, weighted", error_weighted))
+	print("%-24s %.0f %%" % ("slip detected", 100*detection))
+	print("%-24s %d ticks" % ("false alarms", false_alarms))
+	print("%-24s %.3f ms (max %.3f ms, budget 100 ms)" % ("cost per tick", np.median(cost)*1000, cost.max()*1000))
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+from os import path, listdir
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "Task"))
+
+# Requirements
+import argparse
+import cv2
+import numpy as np
+from time import time
+
+# Functions
+from vision import Threshold, Detector
+
+
+def Legacy(closing):
+	# Per-contour loop of the first Vision version, kept as the reference
+	contours = cv2.findContours(closing,cv2.RETR_LIST,cv2.CHAIN_APPROX_NONE)[-2]
+	targets = []
+	for cnt in contours:
+		CurrAera=cv2.contourArea(cnt)
+		if CurrAera>1500 :
+			hull = cv2.approxPolyDP(cnt,0.02*cv2.arcLength(cnt,True),True)
+			approx = cv2.convexHull(cnt)
+			if not cv2.isContourConvex(hull):
+				m = cv2.moments(hull)
+				n = cv2.moments(approx)
+				if m['m00'] !=0:
+					targets.append((n['m10']/n['m00'], n['m01']/n['m00']))
+	return targets
+
+
+def Synthetic(count, cols = 640, rows = 480, seed = 0):
+	# Textured terrain with reddish speckles and a few red targets
+	random = np.random.RandomState(seed)
+	frames = []
+	for k in range(count):
+		img = random.randint(40, 120, (rows, cols, 3)).astype(np.uint8)
+		speckles = random.rand(rows//4, cols//4) > 0.93
+		speckles = cv2.resize(speckles.astype(np.uint8), (cols, rows), interpolation = cv2.INTER_NEAREST)
+		img[speckles > 0] = (30, 30, 200)
+		for t in range(3):
+			x, y = random.randint(60, cols-60), random.randint(60, rows-60)
+			cv2.ellipse(img, (x, y), (45, 35), 0, 0, 300, (20, 20, 220), -1)
+		frames.append(img)
+	return frames
+
+
+def Load(folder):
+	frames = []
+	for name in sorted(listdir(folder)):
+		if name.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')):
+			frames.append(cv2.imread(path.join(folder, name)))
+	return frames
+
+
+def Run(frames, repeat = 3):
+	# Per-frame cost (ms) of the shared threshold and of both detection stages
+	detector = Detector(frames[0].shape[1], frames[0].shape[0])
+	masks = [Threshold(img) for img in frames]
+	cost = {'threshold': [], 'legacy': [], 'detector': []}
+	found = {'legacy': 0, 'detector': 0}
+	for r in range(repeat):
+		for img, mask in zip(frames, masks):
+			start_time = time()
+			Threshold(img)
+			cost['threshold'].append(time() - start_time)
+			start_time = time()
+			found['legacy'] += len(Legacy(mask))
+			cost['legacy'].append(time() - start_time)
+			start_time = time()
+			found['detector'] += len(detector.Detect(mask))
+			cost['detector'].append(time() - start_time)
+	contours = np.mean([len(cv2.findContours(mask.copy(),cv2.RETR_LIST,cv2.CHAIN_APPROX_NONE)[-2]) for mask in masks])
+	return cost, found, contours
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description = "Per-frame cost of the Vision detection stage")
+	parser.add_argument('frames', nargs = '?', help = "folder of recorded frames (synthetic frames if omitted)")
+	parser.add_argument('--count', type = int, default = 20, help = "number of synthetic frames")
+	parser.add_argument('--repeat', type = int, default = 3)
+	args = parser.parse_args()
+
+	frames = Load(args.frames) if args.frames else Synthetic(args.count)
+	cost, found, contours = Run(frames, args.repeat)
+	print("%d frames, %.0f contours per frame" % (len(frames), contours))
+	for stage in ['threshold', 'legacy', 'detector']:
+		values = np.array(cost[stage])*1000
+		print("%-12s median %7.3f ms   p90 %7.3f ms" % (stage, np.median(values), np.percentile(values, 90)))
+	print("%-12s legacy %d, detector %d" % ("targets", found['legacy']//args.repeat, found['detector']//args.repeat))
@@ -0,0 +1,14 @@
+# Off-hardware picamera for the benchmarks, the camera itself is not benchmarked
+
+
+class PiCamera():
+
+	def __init__(self):
+		self.resolution = (640, 480)
+		self.framerate = 10
+
+	def capture_continuous(self, output, format = "bgr", use_video_port = False):
+		raise IOError("No camera off-hardware")
+
+	def close(self):
+		pass
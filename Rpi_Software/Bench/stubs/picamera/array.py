@@ -0,0 +1,8 @@
+class PiRGBArray():
+
+	def __init__(self, camera, size = None):
+		self.camera = camera
+		self.size = size
+
+	def truncate(self, size = 0):
+		pass
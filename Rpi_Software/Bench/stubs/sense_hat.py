@@ -0,0 +1,22 @@
+# Off-hardware SenseHat for the benchmarks, constant readings
+
+
+class SenseHat():
+
+	def set_imu_config(self, compass, gyro, accel):
+		pass
+
+	def get_orientation(self):
+		return {'yaw': 10.0, 'pitch': 0.5, 'roll': -0.5}
+
+	def get_orientation_radians(self):
+		return {'yaw': 0.17, 'pitch': 0.01, 'roll': -0.01}
+
+	def get_accelerometer_raw(self):
+		return {'x': 0.01, 'y': -0.02, 'z': 1.0}
+
+	def get_gyroscope_raw(self):
+		return {'x': 0.0, 'y': 0.0, 'z': 0.05}
+
+	def get_temperature(self):
+		return 25.0
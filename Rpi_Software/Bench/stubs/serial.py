@@ -0,0 +1,16 @@
+# Off-hardware serial port for the benchmarks, answers like Control.ino
+
+
+class Serial():
+
+	def __init__(self, port = None, baudrate = 9600, timeout = None):
+		self.line = "15.02,14.87,15.10,14.95,250,250\n"
+
+	def flush(self):
+		pass
+
+	def write(self, data):
+		return len(data)
+
+	def readline(self):
+		return self.line
@@ -0,0 +1,42 @@
+import numpy as np
+from math import cos, sin, pi
+
+from controller import Reset
+
+
+class Plant():
+
+	def __init__(self, R = 0.045, L = 0.750, dt = 0.1, noise = 0.3, gyro_noise = 0.005, seed = 0):
+		# Four-wheel skid steer rover, wheels in slip.py order (left up, right up, left down, right down)
+		self.R = R
+		self.L = L
+		self.dt = dt
+		self.noise = noise		# RPM
+		self.gyro_noise = gyro_noise	# rad/s
+		self.random = np.random.RandomState(seed)
+
+		# Ground truth pose
+		self.X = 0.0
+		self.Y = 0.0
+		self.W = 0.0
+
+		# Slip ratio of each wheel, 0 = grip, 0.5 = spins twice as fast as it drives
+		self.slip = np.zeros(4)
+
+	def Step(self, left_rpm, right_rpm):
+		# Moves the rover one period, returns the encoder speeds (RPM) and the gyro yaw rate (rad/s)
+		convert = 2*pi/60.0
+		v_left = self.R*left_rpm*convert
+		v_right = self.R*right_rpm*convert
+		v = 0.5*(v_left + v_right)
+		yaw_rate = (v_right - v_left)/self.L
+
+		self.W = Reset(self.W + yaw_rate*self.dt)
+		self.X += v*cos(self.W)*self.dt
+		self.Y += v*sin(self.W)*self.dt
+
+		# A slipping wheel turns faster than the ground speed it gives
+		ground = np.array([left_rpm, right_rpm, left_rpm, right_rpm], float)
+		wheels = ground/(1.0 - self.slip) + self.random.normal(0.0, self.noise, 4)
+		gyro = yaw_rate + self.random.normal(0.0, self.gyro_noise)
+		return wheels, gyro
@@ -0,0 +1,56 @@
+import ctypes
+import numpy as np
+from multiprocessing import RawArray, RawValue
+
+# Fixed-size detection record exchanged between the Vision process and the rover
+DETECTION = np.dtype([	('seq', '<i8'),		# write sequence, -1 while the slot is written
+			('time', '<f8'),	# capture time (s)
+			('frame', '<i4'),	# frame number
+			('x', '<f4'),		# barycentre (pixels)
+			('y', '<f4'),
+			('area', '<f4'),	# pixels
+			('bearing', '<f4'),	# rad, positive to the left
+			('range', '<f4'),	# m, 0 when unknown
+			('score', '<f4')])
+
+
+class Ring():
+
+	def __init__(self, size = 64, dtype = DETECTION):
+		# Shared memory, must be created before the Vision process is forked
+		self.size = size
+		self.dtype = dtype
+		self.memory = RawArray('b', size*dtype.itemsize)
+		self.count = RawValue(ctypes.c_longlong, 0)
+		self.slots = np.frombuffer(self.memory, dtype)
+		self.slots['seq'] = -1
+
+	def Push(self, **fields):
+		# Single writer: mark the slot busy, fill it, then publish its sequence
+		seq = self.count.value
+		slot = self.slots[seq % self.size:seq % self.size + 1]
+		slot['seq'] = -1
+		for name, value in fields.items():
+			slot[name] = value
+		slot['seq'] = seq
+		self.count.value = seq + 1
+
+	def Read(self, since = 0):
+		# Records written since sequence 'since', oldest first
+		count = self.count.value
+		first = max(since, count - self.size, 0)
+		records = []
+		for seq in range(first, count):
+			# Drop the record if the writer reused the slot while copying it
+			slot = self.slots[seq % self.size]
+			before = slot['seq']
+			record = slot.copy()
+			if before == seq and slot['seq'] == seq:
+				records.append(record)
+		return records, count
+
+	def Latest(self):
+		records, count = self.Read(self.count.value - 1)
+		if records:
+			return records[-1]
+		return None
@@ -0,0 +1,222 @@
+import os
+import json
+import numpy as np
+from time import time
+
+# On-disk layout of a telemetry log
+#
+#   <name>        HEADER_SIZE bytes of header (magic + JSON schema, space padded)
+#                 then fixed-size chunks, each one storing CHUNK rows of every
+#                 column one after the other (columnar inside the chunk)
+#   <name>.idx    one float64 triple (t_first, t_last, rows) per chunk, the
+#                 first column is the time base, in seconds since the epoch
+#
+# Every chunk has the same size so the whole file maps onto a numpy structured
+# array of chunks, and a column of one chunk is a contiguous view of the file.
+# The chunk being filled is already on disk, zero padded, and its rows are
+# written in place every 'interval' seconds.
+
+MAGIC = b'HUMLOG1\n'
+HEADER_SIZE = 4096
+CHUNK = 256
+
+# Columns written by Rover.Navigation
+NAVIGATION = [	('time', 'f8'), ('t_nav', 'f4'),
+		('yaw', 'f4'), ('pitch', 'f4'), ('roll', 'f4'), ('temperature', 'f4'),
+		('ax', 'f4'), ('ay', 'f4'), ('az', 'f4'),
+		('Xcurrent', 'f8'), ('Ycurrent', 'f8'), ('Wcurrent', 'f4'),
+		('omega_righ', 'f4'), ('omega_left', 'f4'),
+		('Wshift', 'f4'), ('Wgyro', 'f4'), ('WcurrentOdo', 'f4'),
+		('wheel_leftUp', 'f4'), ('wheel_rightUp', 'f4'), ('wheel_leftDw', 'f4'), ('wheel_rightDw', 'f4'),
+		('weight_leftUp', 'f4'), ('weight_rightUp', 'f4'), ('weight_leftDw', 'f4'), ('weight_rightDw', 'f4')]
+
+
+def chunkType(columns, chunk):
+	return np.dtype([(str(name), '<' + fmt[-2:], (chunk,)) for name, fmt in columns])
+
+
+def readHeader(path):
+	fichier = open(path, 'rb')
+	header = fichier.read(HEADER_SIZE)
+	fichier.close()
+	if len(header) != HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+		raise ValueError("%s is not a telemetry log" % path)
+	schema = json.loads(header[len(MAGIC):].decode('ascii'))
+	columns = [(str(name), str(fmt)) for name, fmt in schema['columns']]
+	return columns, schema['chunk']
+
+
+class Writer():
+
+	def __init__(self, path, columns, chunk = CHUNK, interval = 1.0):
+		self.path = path
+		self.index = path + '.idx'
+
+		# A log written with another schema is kept aside under its modification time
+		if os.path.exists(path) and os.path.getsize(path) > 0:
+			old_columns, old_chunk = readHeader(path)
+			if [name for name, fmt in old_columns] != [name for name, fmt in columns]:
+				suffix = '.%d' % os.path.getmtime(path)
+				os.rename(path, path + suffix)
+				if os.path.exists(self.index):
+					os.rename(self.index, path + suffix + '.idx')
+
+		# Reuse the schema of an existing log, appending new chunks after it
+		if os.path.exists(path) and os.path.getsize(path) > 0:
+			columns, chunk = old_columns, old_chunk
+		else:
+			header = MAGIC + json.dumps({'chunk': chunk, 'columns': columns}).encode('ascii')
+			if len(header) > HEADER_SIZE:
+				raise ValueError("Schema too large for the header")
+			fichier = open(path, 'wb')
+			fichier.write(header.ljust(HEADER_SIZE, b' '))
+			fichier.close()
+			open(self.index, 'wb').close()
+
+		self.columns = columns
+		self.chunk = chunk
+		dtype = chunkType(columns, chunk)
+		self.buffer = np.zeros(1, dtype)
+		self.views = [self.buffer[name][0] for name, fmt in columns]
+		self.offsets = [dtype.fields[name][1] for name, fmt in columns]
+		self.rows = 0
+		self.written = 0	# rows of the current chunk already on disk
+
+		# New chunks go after the last indexed one
+		self.k = min(os.path.getsize(self.index)//24, (os.path.getsize(path)-HEADER_SIZE)//dtype.itemsize)
+		self.data = open(path, 'r+b')
+		self.data_index = open(self.index, 'r+b')
+		self.interval = interval
+		self.last = time()
+
+	def Append(self, *values):
+		# One value per column, in schema order
+		for view, value in zip(self.views, values):
+			view[self.rows] = value
+		self.rows += 1
+		if self.rows == self.chunk or time() - self.last >= self.interval:
+			self.Flush()
+
+	def Flush(self):
+		if self.rows == self.written:
+			return
+		base = HEADER_SIZE + self.k*self.buffer.itemsize
+		if self.written == 0:
+			# First write of the chunk: all of it, so the file only holds complete chunks
+			self.data.seek(base)
+			self.data.write(self.buffer.tobytes())
+		else:
+			# Only the new rows of each column
+			for view, offset in zip(self.views, self.offsets):
+				self.data.seek(base + offset + self.written*view.itemsize)
+				self.data.write(view[self.written:self.rows].tobytes())
+		self.data.flush()
+
+		# Index entry of the chunk, rewritten as it fills
+		stamps = self.views[0][:self.rows]
+		self.data_index.seek(self.k*24)
+		self.data_index.write(np.array([stamps.min(), stamps.max(), self.rows], '<f8').tobytes())
+		self.data_index.flush()
+		self.written = self.rows
+		self.last = time()
+
+		if self.rows == self.chunk:
+			self.k += 1
+			self.buffer[...] = 0
+			self.rows = 0
+			self.written = 0
+
+	def Close(self):
+		self.Flush()
+		self.data.close()
+		self.data_index.close()
+
+
+class Reader():
+
+	def __init__(self, path):
+		self.path = path
+		self.columns, self.chunk = readHeader(path)
+		self.names = [name for name, fmt in self.columns]
+
+		# Chunk index, the first column is the time base
+		index = np.fromfile(path + '.idx', '<f8').reshape(-1, 3)
+		dtype = chunkType(self.columns, self.chunk)
+		count = min(len(index), (os.path.getsize(path)-HEADER_SIZE)//dtype.itemsize)
+		self.t_first = index[:count, 0]
+		self.t_last = index[:count, 1]
+		self.counts = index[:count, 2].astype(np.int64)
+		self.rows = int(self.counts.sum())
+
+		# Zero-copy view on every chunk
+		if count > 0:
+			self.chunks = np.memmap(path, dtype, 'r', HEADER_SIZE, (count,))
+		else:
+			self.chunks = np.zeros(0, dtype)
+
+	def Column(self, name, k):
+		# Valid rows of one column in chunk k, without copy
+		return self.chunks[name][k][:self.counts[k]]
+
+	def Chunks(self, start = None, end = None):
+		# Chunks overlapping [start, end], found from the index only
+		# (not sorted: the clock of the rover may go back between sessions)
+		mask = np.ones(len(self.counts), bool)
+		if start is not None:
+			mask &= self.t_last >= start
+		if end is not None:
+			mask &= self.t_first <= end
+		return np.flatnonzero(mask)
+
+	def Slice(self, names = None, start = None, end = None, every = 1):
+		# Yield one dict of column arrays per chunk, rows restricted to the time range
+		names = names or self.names
+		time = self.names[0]
+		offset = 0
+		for k in self.Chunks(start, end):
+			mask = np.ones(self.counts[k], bool)
+			t = self.Column(time, k)
+			if start is not None:
+				mask &= t >= start
+			if end is not None:
+				mask &= t <= end
+			rows = np.flatnonzero(mask)
+			if every > 1:
+				# Keep the decimation phase across chunk boundaries
+				keep = (offset + np.arange(len(rows))) % every == 0
+				offset += len(rows)
+				rows = rows[keep]
+			if len(rows) == 0:
+				continue
+			yield dict((name, self.Column(name, k)[rows]) for name in names)
+
+	def Statistics(self, names = None, start = None, end = None):
+		# Streaming count, min, max, mean and standard deviation per column
+		# Mean and sum of squared deviations per chunk, merged with Chan's parallel update:
+		# no E[x^2] - mean^2 cancellation on large values such as the epoch time
+		names = names or self.names
+		count = dict((name, 0) for name in names)
+		mean = dict((name, 0.0) for name in names)
+		square = dict((name, 0.0) for name in names)
+		low = dict((name, np.inf) for name in names)
+		high = dict((name, -np.inf) for name in names)
+		for block in self.Slice(names, start, end):
+			for name in names:
+				values = block[name].astype(np.float64)
+				n = len(values)
+				m = values.mean()
+				delta = m - mean[name]
+				total = count[name] + n
+				square[name] += ((values - m)**2).sum() + delta*delta*count[name]*n/total
+				mean[name] += delta*n/total
+				count[name] = total
+				low[name] = min(low[name], values.min())
+				high[name] = max(high[name], values.max())
+		stats = {}
+		for name in names:
+			n = count[name]
+			if n == 0:
+				stats[name] = (0, np.nan, np.nan, np.nan, np.nan)
+				continue
+			stats[name] = (n, low[name], high[name], mean[name], (square[name]/n)**0.5)
+		return stats
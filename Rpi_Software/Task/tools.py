@@ -1,4 +1,8 @@
 from time import time, sleep
+from collections import deque
+from multiprocessing import Process
+from threading import Event
+import logging
 
 
 def Timer(period, start_time):
@@ -8,6 +12,116 @@ def Timer(period, start_time):
 		sleep(pause)
 
 
+class Startup():
+
+	def __init__(self, start = None):
+		# Phases are timed from 'start', the process start time when given
+		self.start = start or time()
+		self.phases = []
+
+	def Phase(self, name):
+		self.phases.append((name, time() - self.start))
+
+	def Time(self, name):
+		for phase, elapsed in self.phases:
+			if phase == name:
+				return elapsed
+		return None
+
+	def Report(self):
+		lines = []
+		last = 0.0
+		for name, elapsed in sorted(self.phases, key = lambda phase: phase[1]):
+			lines.append("%-20s %8.3f s  (+%.3f s)" % (name, elapsed, elapsed - last))
+			last = elapsed
+		return '\n'.join(lines)
+
+
+class Jitter():
+
+	def __init__(self, period, size = 600):
+		# Keep the last 'size' loop periods
+		self.period = period
+		self.periods = deque(maxlen = size)
+		self.last = None
+
+	def Tick(self):
+		# Call once at the top of each loop iteration
+		now = time()
+		if self.last is not None:
+			self.periods.append(now - self.last)
+		self.last = now
+
+	def Report(self):
+		# Mean, standard deviation and worst deviation from the period (s)
+		# Snapshot first: Tick() appends from the loop threads while we iterate
+		periods = list(self.periods)
+		n = len(periods)
+		if n == 0:
+			return 0.0, 0.0, 0.0
+		mean = sum(periods)/n
+		std = pow(sum((p-mean)*(p-mean) for p in periods)/n, 0.5)
+		worst = max(abs(p-self.period) for p in periods)
+		return mean, std, worst
+
+
+class Supervisor():
+
+	def __init__(self, name, target, args = (), delay = 1.0, max_delay = 30.0, failures = 5):
+		self.name = name
+		self.target = target
+		self.args = args
+		# Pause before a restart (s), doubled after each failure up to 'max_delay'
+		self.delay = delay
+		self.max_delay = max_delay
+		# Supervision gives up after 'failures' failures in a row
+		self.failures = failures
+		self.process = None
+		self.started = 0.0
+		self.restarts = 0
+		self.stopped = Event()
+
+	def Start(self):
+		self.process = Process(name = self.name, target = self.target, args = self.args)
+		self.process.daemon = True
+		self.process.start()
+		self.started = time()
+
+	def Run(self):
+		# Thread target: restart the process each time it dies, after a growing pause
+		if self.process is None:
+			self.Start()
+		pause = self.delay
+		failures = 0
+		while not self.stopped.is_set():
+			self.process.join(0.5)
+			if self.process.is_alive():
+				continue
+			if self.process.exitcode == 0 or self.stopped.is_set():
+				# Clean exit, nothing to supervise anymore
+				break
+
+			# A process that ran longer than the longest pause was working, count again from zero
+			if time() - self.started > self.max_delay:
+				pause = self.delay
+				failures = 0
+			failures += 1
+			if failures >= self.failures:
+				logging.error("%s died %d times in a row (exit code %s), not restarted" % (self.name, failures, self.process.exitcode))
+				break
+			logging.debug("%s died (exit code %s), restart in %.1f s" % (self.name, self.process.exitcode, pause))
+			self.stopped.wait(pause)
+			pause = min(2*pause, self.max_delay)
+			if not self.stopped.is_set():
+				self.restarts += 1
+				self.Start()
+
+	def Stop(self):
+		self.stopped.set()
+		if self.process is not None and self.process.is_alive():
+			self.process.terminate()
+
+
 class color:
 	PURPLE = '\033[95m'
 	CYAN = '\033[96m'
@@ -12,11 +12,14 @@ class Arduino():
 			baudrate = 9600, 
 			timeout = 1.0)
 
-		# getDatas params
+		# getDatas params: leftUp, rightUp, leftDw, rightDw speeds (RPM), left and right distances (mm)
 		self.val1 = 0.0
 		self.val2 = 0.0
 		self.val3 = 0.0
 		self.val4 = 0.0
+		self.val5 = 0.0
+		self.val6 = 0.0
+		self.received = False
 
 	def sendDatas(self, val_a, val_b, val_c):
 		start_time = time()
@@ -35,13 +38,15 @@ class Arduino():
 		try:
 			textline = self.sensorsData.readline()
 			dataNums = textline.split(',')
-			if len(dataNums)==4: 
-				self.val1 = float(dataNums[0])
-				self.val2 = float(dataNums[1])
-				self.val3 = float(dataNums[2])
-				self.val4 = float(dataNums[3])
+			if len(dataNums)==4:
+				# Old firmware: up wheel speeds only, used for the down wheels too
+				dataNums = dataNums[0:2] + dataNums
+			if len(dataNums)==6: 
+				values = [float(data) for data in dataNums]
+				self.val1, self.val2, self.val3, self.val4, self.val5, self.val6 = values
+				self.received = True
 		except ValueError:
 			pass
 
 		Timer(self.period, start_time)
-		return self.val1, self.val2, self.val3, self.val4
+		return self.val1, self.val2, self.val3, self.val4, self.val5, self.val6
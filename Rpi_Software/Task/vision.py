@@ -0,0 +1,154 @@
+import logging
+import cv2
+import numpy as np
+from math import atan, tan, pi
+from time import time
+
+# Red thresholds (HSV), the hue wraps around 180
+min_red = np.array((0. ,125. ,125. ))
+max_red = np.array((7. ,255. ,255. ))
+min_red2 = np.array((170. ,125. ,125. ))
+max_red2 = np.array((180. ,255. ,255. ))
+kernel = np.ones((7,7),np.uint8)
+
+# Camera model (Pi camera v1, horizontal and vertical field of view)
+HFOV = 53.5*pi/180
+VFOV = 41.4*pi/180
+
+
+def Threshold(img):
+        # Red mask of a BGR image
+        img = cv2.medianBlur(img,5)
+        imageHSV = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        imgThresh = cv2.inRange(imageHSV, min_red, max_red)
+        imgThresh2= cv2.inRange(imageHSV, min_red2, max_red2)
+        imgThreshT=cv2.bitwise_or(imgThresh,imgThresh2)
+        return cv2.morphologyEx(imgThreshT, cv2.MORPH_CLOSE, kernel)
+
+
+class Detector():
+
+        def __init__(self, cols = 640, rows = 480, height = 0.20, min_area = 1500, min_side = 20, max_aspect = 4.0, min_fill = 0.2, scale = 2):
+                # Target height (m) used for the range estimate
+                self.height = height
+
+                # Components are labelled on a mask reduced 'scale' times
+                self.scale = scale
+
+                # Cheap filters, applied to every component at once
+                self.min_area = min_area
+                self.min_side = min_side
+                self.max_aspect = max_aspect
+                self.min_fill = min_fill
+
+                # Pinhole focal lengths (pixels)
+                self.cx = cols/2.0
+                self.fx = self.cx/tan(HFOV/2)
+                self.fy = (rows/2.0)/tan(VFOV/2)
+
+        def Candidates(self, mask):
+                # Connected components statistics, filtered in bulk with numpy
+                if self.scale > 1:
+                        mask = mask[::self.scale, ::self.scale]
+                n, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity = 8)
+                # Back to full resolution: lengths scale once, areas twice
+                stats = stats[1:]*self.scale
+                stats[:, cv2.CC_STAT_AREA] *= self.scale
+                w = stats[:, cv2.CC_STAT_WIDTH]
+                h = stats[:, cv2.CC_STAT_HEIGHT]
+                area = stats[:, cv2.CC_STAT_AREA]
+                keep = (area > self.min_area) & (w >= self.min_side) & (h >= self.min_side)
+                keep &= np.maximum(w, h) <= self.max_aspect*np.minimum(w, h)
+                keep &= area >= self.min_fill*w*h
+                return stats[keep]
+
+        def Detect(self, mask):
+                # Scored targets (ring.DETECTION fields), best first
+                targets = []
+                for x, y, w, h, area in self.Candidates(mask):
+
+                        # Expensive shape tests, only on the largest blob of the full resolution bounding box
+                        roi = mask[y:y+h+self.scale, x:x+w+self.scale].copy()
+                        cnt = max(cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)[-2], key = len)
+                        area = cv2.contourArea(cnt)
+                        hull = cv2.approxPolyDP(cnt,0.02*cv2.arcLength(cnt,True),True)
+                        if cv2.isContourConvex(hull):
+                                continue
+                        approx = cv2.convexHull(cnt)
+                        n = cv2.moments(approx)
+                        if n['m00'] == 0:
+                                continue
+
+                        # Barycentre in image coordinates, bearing positive to the left
+                        bx = x + n['m10']/n['m00']
+                        by = y + n['m01']/n['m00']
+                        bearing = atan((self.cx - bx)/self.fx)
+                        distance = self.fy*self.height/h
+
+                        # Score: solidity weighted by size
+                        solidity = float(area)/n['m00']
+                        score = min(solidity, 1.0)*min(float(area)/(4*self.min_area), 1.0)
+                        targets.append(dict(x = bx, y = by, area = area, bearing = bearing, range = distance, score = score))
+
+                targets.sort(key = lambda target: -target['score'])
+                return targets
+
+
+def Vision(ring, display = False, ready = None):
+        # Runs in its own process (see main.py), detections are pushed in 'ring'
+        # and 'ready' is set once the camera delivers frames
+        from picamera import PiCamera
+        from picamera.array import PiRGBArray
+        start_time = time()
+        if display:
+                cv2.namedWindow('Vision', cv2.WINDOW_NORMAL)
+        cols = 640
+        rows = 480
+        camera = PiCamera()
+        camera.resolution = (cols, rows)
+        camera.framerate = 10
+        rawCapture = PiRGBArray(camera, size=(cols,rows))
+        detector = Detector(cols, rows)
+        period = 0.1
+        frame_count = 0
+        logging.debug("Starting")
+
+        for frame in camera.capture_continuous(rawCapture, format = "bgr", use_video_port = True):
+                start_time = time()
+                frame_count += 1
+                if ready is not None and not ready.is_set():
+                        logging.debug("Camera ready")
+                        ready.set()
+
+                # Image processing
+                img = frame.array
+                closing = Threshold(img)
+                targets = detector.Detect(closing)
+
+                # Best target pushed last, so ring.Latest() returns it
+                for target in reversed(targets):
+                        ring.Push(time = start_time, frame = frame_count, **target)
+
+                rawCapture.truncate(0)
+                if display:
+                        for target in targets:
+                                cv2.circle(img,(int(target['x']),int(target['y'])),4,(255,0,255),-1)
+
+                        #CREATE COMPOSED IMAGE
+                        rows,cols,channels = img.shape
+                        compoImage = np.zeros((rows,2*cols,3), np.uint8)
+                        compoImage[0:rows, 0:cols ] = img
+                        compoImage[0:rows, cols:2*cols ] = cv2.cvtColor(closing, cv2.COLOR_GRAY2BGR)
+
+                        #CAPTURE VIDEO
+                        cv2.imshow('Vision', compoImage)
+                        key = cv2.waitKey(1)
+
+                        # SORTIE
+                        if key == 27:
+                                camera.close()
+                                break
+
+        if display:
+                cv2.destroyAllWindows()
+        logging.debug("Exiting")
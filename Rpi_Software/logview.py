@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "Task"))
+
+# Requirements
+import argparse
+from time import localtime, strftime
+
+# Functions
+from telemetry import Reader, Writer, NAVIGATION
+
+
+def Info(args):
+	log = Reader(args.log)
+	print("%-20s %s" % ("Rows", log.rows))
+	print("%-20s %s" % ("Chunks", len(log.counts)))
+	if log.rows > 0:
+		first, last = log.t_first.min(), log.t_last.max()
+		print("%-20s %.3f - %.3f" % ("Time (s)", first, last))
+		print("%-20s %s - %s" % ("Date", strftime("%Y-%m-%d %H:%M:%S", localtime(first)), strftime("%Y-%m-%d %H:%M:%S", localtime(last))))
+	for name, fmt in log.columns:
+		print("%-20s %s" % (name, fmt))
+
+
+def Slice(args):
+	log = Reader(args.log)
+	names = args.columns.split(',') if args.columns else log.names
+	sys.stdout.write(','.join(names) + '\n')
+
+	# Full precision: shortest exact form for f8, 9 digits round-trip f4
+	fmts = dict(log.columns)
+	formats = [repr if fmts[name].endswith('8') else (lambda value: "%.9g" % value) for name in names]
+	for block in log.Slice(names, args.start, args.end, args.every):
+		for row in zip(*[block[name] for name in names]):
+			sys.stdout.write(','.join(text(float(value)) for text, value in zip(formats, row)) + '\n')
+
+
+def Stats(args):
+	log = Reader(args.log)
+	names = args.columns.split(',') if args.columns else log.names
+	stats = log.Statistics(names, args.start, args.end)
+	print("%-20s %10s %12s %12s %12s %12s" % ("column", "count", "min", "max", "mean", "std"))
+	for name in names:
+		print("%-20s %10d %12.5g %12.5g %12.5g %12.5g" % ((name,) + stats[name]))
+
+
+def Convert(args):
+	# Import an old CSV 'data' file written by Rover.Navigation (17 columns, no wheel data)
+	log = Writer(args.log, NAVIGATION)
+	fichier = open(args.csv, 'r')
+	for line in fichier:
+		values = line.strip().split(',')
+		if len(values) == 17:
+			values += [0.0]*4 + [1.0]*4
+		if len(values) == len(NAVIGATION):
+			log.Append(*[float(value) for value in values])
+	fichier.close()
+	log.Close()
+
+
+parser = argparse.ArgumentParser(description = "Query a rover telemetry log")
+commands = parser.add_subparsers()
+
+command = commands.add_parser('info', help = "schema and time span")
+command.set_defaults(run = Info)
+
+for name, run, text in [('slice', Slice, "print rows as CSV"), ('stats', Stats, "per-column statistics")]:
+	command = commands.add_parser(name, help = text)
+	command.add_argument('--columns', help = "comma separated column names")
+	command.add_argument('--start', type = float, help = "first time (s since the epoch)")
+	command.add_argument('--end', type = float, help = "last time (s since the epoch)")
+	if name == 'slice':
+		command.add_argument('--every', type = int, default = 1, help = "keep one row out of N")
+	command.set_defaults(run = run)
+
+command = commands.add_parser('convert', help = "import an old CSV data file")
+command.add_argument('csv')
+command.set_defaults(run = Convert)
+
+for command in commands.choices.values():
+	command.add_argument('log')
+
+if __name__ == '__main__':
+	args = parser.parse_args()
+	args.run(args)
@@ -1,46 +1,95 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+from time import sleep, time
+process_start = time()
+
 import sys
 sys.path.insert(0, "/home/pi/Projects/Humility/Rpi_Software/Task/")
 
-# Requirements
+# Requirements (psutil, numpy, cv2 and the hardware modules are imported when needed)
 import logging
-import psutil
 from threading import Thread, active_count
-from termcolor import colored
-from time import sleep, time
 from os import system, name
 
 # Functions
-from rover import Rover, Vision
-from tools import Timer, color
+from rover import Rover
+from tools import Timer, Supervisor, Startup, color
+
+# Options: --vision to run the Vision process, --display to show its window
+isVisionActive = '--vision' in sys.argv
+isDisplayActive = '--display' in sys.argv
+
+def VisionStartup():
+	# Camera readiness as a startup phase, logged when late
+	VisionReady.wait(Rover.ready_timeout)
+	if not VisionReady.is_set():
+		logging.warning("vision not ready after %.0f s" % Rover.ready_timeout)
+		VisionReady.wait()
+	startup.Phase("vision")
 
 try:
 	# Initialize
-	Rover = Rover()
+	startup = Startup(process_start)
+	startup.Phase("imports")
+	Rover = Rover(startup)
+
+	# Vision runs in its own process so its Python loop does not hold the GIL of the control threads
+	# Forked here, before any thread starts, and its camera warms up while the other subsystems start
+	if isVisionActive:
+		from multiprocessing import Event
+		from ring import Ring
+		from vision import Vision
+		Detections = Ring()
+		VisionReady = Event()
+		Rover.detections = Detections
+		VisionProcess = Supervisor("VISION", Vision, (Detections, isDisplayActive, VisionReady))
+		VisionProcess.Start()
+		Supervision = Thread(name = "SUPERVISOR", target = VisionProcess.Run)
+		Supervision.daemon = True
+		Supervision.start()
+		Camera = Thread(name = "CAMERA", target = VisionStartup)
+		Camera.daemon = True
+		Camera.start()
           
 	# Create all threads
 	Guidance = Thread(name = "GUIDANCE", target = Rover.Guidance)
 	Navigation = Thread(name = "NAVIGATION", target = Rover.Navigation)
 	Control = Thread(name = "CONTROL", target = Rover.Control)
-	Vision = Thread(name = "VISION", target = Vision)
 	
 	# Daemonize thread
 	Guidance.daemon	= True
     	Navigation.daemon = True
 	Control.daemon = True
-	Vision.daemon = True
 
 	# Launch thread
 	Guidance.start()
     	Navigation.start()
     	Control.start()
-	#Vision.start()
+	startup.Phase("threads")
 	
-	# Print data thread
+	# Print data thread, once the rover is driving
 	logging.debug("Starting")
-	sleep(5)
+	# Guidance itself waits up to ready_timeout for Navigation and Control
+	if not Rover.WaitReady(['guidance'], 2*Rover.ready_timeout):
+		# Guidance stopped the rover (a required subsystem failed): stop the others and exit
+		Rover.fsm = 'Stop'
+		Rover.exit = True
+		if isVisionActive:
+			VisionProcess.Stop()
+		Navigation.join(1.0)
+		Control.join(1.0)
+		print startup.Report()
+		failed = ', '.join("%s (%r)" % (subsystem, error) for subsystem, error in sorted(Rover.failed.items()))
+		logging.error("rover not started, failed: %s" % (failed or "guidance not ready"))
+		sys.exit(1)
+	wait_time = time()
+	while startup.Time("first command") is None and time() - wait_time < Rover.ready_timeout:
+		sleep(0.01)
+	if startup.Time("first command") is None:
+		logging.warning("control not sending commands after %.0f s" % Rover.ready_timeout)
+	print startup.Report()
+	import psutil
 	Traj = True
 	to_angle = 180/3.14
 	grid = '--------------------'	
@@ -50,6 +99,10 @@ try:
 		print color.BOLD + grid + ' MARS ROVER SOFTWARE ' + grid + grid + grid + color.END
 		print "%-20r %-10s" %("CPU (%)", psutil.cpu_percent(interval = None, percpu = True))
 		print "%-20r %-10s" %("Target Reached", Rover.fsm)
+		if startup.Time("first command") is not None:
+			print "%-20r %-10s" %("First command (s)", round(startup.Time("first command"),3))
+		else:
+			print "%-20r %-10s" %("First command (s)", "-")
  		print color.BOLD + grid + grid + grid + grid + grid + color.END
 		print " "
 		print color.BOLD + color.GREEN + 'GUIDANCE' + color.END 
@@ -65,12 +118,25 @@ try:
 			pass
 		print "%-20r %-10s %-20r %-10s %-20r %-10s" %("Xcurrent", round(Rover.Xcurrent,3), "Ycurrent", round(Rover.Ycurrent,3), "Heading current", round(Rover.Wcurrent*to_angle,3))
 		print "%-20r %-10s" %("Wgyro", round(Rover.Wgyro*180/3.14,3)) 
+		if Rover.slip is not None:
+			print "%-20r %-10s %-20r %-10s" %("Slip weights", [round(w,2) for w in Rover.slip.weights], "Slipping", list(Rover.slip.slipping))
 		print " " 
 		print color.BOLD + color.PURPLE + 'CONTROL' + color.END
 		print "%-20r %-10s" %("time process", round(Rover.t_con,3))
 		print "%-20r %-10s %-20r %-10s" %("left_speed_ref", round(Rover.left_omega_ref,3), "right_ref", round(Rover.righ_omega_ref,3))
 		print "%-20r %-10s %-20r %-10s" %("left_speed_mes", round(Rover.left_omega_mes,3), "right_mes", round(Rover.righ_omega_mes,3))
 		print " "
+		print color.BOLD + color.CYAN + 'VISION' + color.END
+		print "%-20r %-10s" %("Vision process", "on" if isVisionActive else "off")
+		if isVisionActive:
+			print "%-20r %-10s" %("camera ready", VisionReady.is_set())
+			print "%-20r %-10s %-20r %-10s" %("restarts", VisionProcess.restarts, "detections", Detections.count.value)
+			print "%-20r %-10s %-20r %-10s %-20r %-10s" %("target bearing", round(Rover.target_bearing*to_angle,2), "target range", round(Rover.target_range,2), "score", round(Rover.target_score,2))
+		mean, std, worst = Rover.jitter_gui.Report()
+		print "%-20r %-10s %-20r %-10s" %("GUIDANCE jitter (ms)", round(std*1000,2), "worst (ms)", round(worst*1000,2))
+		mean, std, worst = Rover.jitter_nav.Report()
+		print "%-20r %-10s %-20r %-10s" %("NAVIGATION jitter (ms)", round(std*1000,2), "worst (ms)", round(worst*1000,2))
+		print " "
 		print color.BOLD + grid + grid + grid + grid + grid + color.END
 		print " "
 		print " "
@@ -79,5 +145,20 @@ try:
 
 except KeyboardInterrupt:
 	Rover.fsm = 'Stop'
+	if isVisionActive:
+		VisionProcess.Stop()
+
+	# Let Guidance send the stop setpoints, then Navigation close its log
+	Guidance.join(0.5)
+	Rover.exit = True
+	Navigation.join(1.0)
+
+	print startup.Report()
+
+	# Loop jitter report, compare runs with and without --vision
+	print "Vision %s" %("on" if isVisionActive else "off")
+	for loop, jitter in [("Guidance", Rover.jitter_gui), ("Navigation", Rover.jitter_nav)]:
+		mean, std, worst = jitter.Report()
+		print "%-12s period %.2f ms, jitter std %.2f ms, worst %.2f ms" %(loop, mean*1000, std*1000, worst*1000)
 	logging.debug("Exiting")
 	raise
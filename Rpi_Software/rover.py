@@ -1,27 +1,25 @@
 import sys 
 sys.path.insert(0, "/home/pi/Projects/Humility/Rpi_Software/Task/")
 
-# Requirements
+# Requirements (hardware modules are imported by the thread that uses them)
 import logging 
-import serial 
-import cv2
-import numpy as np
 from sys import path 
 from math import cos, sin, pi, fabs, atan2 
 from time import sleep, time 
-from picamera import PiCamera 
-from picamera.array import PiRGBArray
-from sense_hat import SenseHat
+from threading import Event
 
 # Functions made by ourself
-from tools import Timer 
-from filter import Filter 
+from tools import Timer, Jitter, Startup 
 from controller import Error, Reset, Corrector, Command, Derivate 
-from uart import Arduino
 
 class Rover():
 
-        def __init__(self):
+        def __init__(self, startup = None):
+
+                # Startup timing and readiness of each subsystem
+                self.startup = startup or Startup()
+                self.ready = {'guidance': Event(), 'navigation': Event(), 'control': Event()}
+                self.failed = {} # subsystem: error raised while it started
 
                 # Process frequency
                 self.t_gui = 0.0
@@ -29,6 +27,10 @@ class Rover():
                 self.t_con = 0.0
                 self.t_vis = 0.0
 
+                # Loop period jitter
+                self.jitter_gui = Jitter(0.1)
+                self.jitter_nav = Jitter(0.1)
+
                 # Accelerations init
                 self.Vx = 0.0
                 self.Vy = 0.0
@@ -54,6 +56,9 @@ class Rover():
                 self.righ_omega_ref = 0.0
                 self.left_omega_mes = 0.0
                 self.righ_omega_mes = 0.0
+                self.wheels_mes = [0.0, 0.0, 0.0, 0.0] # leftUp, rightUp, leftDw, rightDw
+                self.Wrate = 0.0 # gyro yaw rate (rad/s)
+                self.slip = None # slip.Slip, created by Navigation
                 
                 # IRsensor parameters
                 self.Precision = 0.05
@@ -62,18 +67,21 @@ class Rover():
                 self.left_dist = 250 # mm
                 self.righ_dist = 250 # mm 
 		        
+		# Vision target, set when main.py runs the Vision process
+		self.detections = None
+		self.target_bearing = 0.0 # rad
+		self.target_range = 0.0 # m
+		self.target_score = 0.0
+
 		# Avoidance manoeuvre
                 self.angleAvoidance = 45*pi/180
                 self.timingRecul = 2.0 #s
 		self.timingRecover = 5 # s  35cm <=> 15RPM
 
-		# Initialize SenseHat to save data
-                self.sense = SenseHat()
-                self.sense.set_imu_config(False, True, True) # compass disabled
+		# SenseHat and KALMAN Filter are started by Navigation
+                self.sense = None
+		self.Kalman = None
                 self.debut = time()
-                
-		# KALMAN Filter
-		self.Kalman = Filter()
 		
 		# Rover Parameters
 		self.R = 0.045 	# m
@@ -87,11 +95,30 @@ class Rover():
                 self.obstacle = False
                 self.GoTo = False
                 self.Traj_false = False
-                self.init_time = 4.95
+                self.ready_timeout = 10.0 # s, then late subsystems are logged
                 logging.basicConfig(level=logging.DEBUG,
                     format='[%(levelname)s] (%(threadName)-10s) %(message)s',
                     )
 
+
+        def WaitReady(self, names, timeout, required = ()):
+                # Wait for the subsystems in 'names', log the late ones after 'timeout' s
+                # False when one of 'required' failed or is late: the rover cannot go on without it
+                start_time = time()
+                while not self.exit:
+                        failed = [name for name in required if name in self.failed]
+                        if failed:
+                                logging.error("%s failed to start: %s" % (', '.join(failed), ', '.join(repr(self.failed[name]) for name in failed)))
+                                return False
+                        late = [name for name in names if not self.ready[name].is_set()]
+                        if not late:
+                                return True
+                        if time() - start_time > timeout:
+                                logging.warning("%s not ready after %.0f s" % (', '.join(late), timeout))
+                                return not [name for name in late if name in required]
+                        sleep(0.05)
+                return False
+
                                         
         def Guidance(self):
                 start_time = time()
@@ -115,10 +142,29 @@ class Rover():
                 period = 0.1
                 counter = 0
                 logging.debug("Starting")
-                Timer(self.init_time, start_time)
+
+                # Wait for the sensors and the Arduino link. A late Arduino link is only logged,
+                # but without Navigation the position never updates: stop the rover
+                if not self.WaitReady(['navigation', 'control'], self.ready_timeout, required = ['navigation']):
+                        self.fsm = 'Stop'
+                        self.exit = True
+                        logging.debug("Exiting")
+                        return
+                self.startup.Phase("guidance")
                 
                 while not self.exit:                    
                         start_time = time()
+                        self.jitter_gui.Tick()
+
+                        # Latest vision target (best of its frame)
+                        if self.detections is not None:
+                                target = self.detections.Latest()
+                                if target is not None and time() - target['time'] < 0.5:
+                                        self.target_bearing = float(target['bearing'])
+                                        self.target_range = float(target['range'])
+                                        self.target_score = float(target['score'])
+                                else:
+                                        self.target_score = 0.0
 
                         # FINITE STATE MACHINE
 
@@ -245,6 +291,9 @@ class Rover():
 					self.righ_omega_ref = 0
 				self.exit = True
 
+                        # First setpoints computed
+                        self.ready['guidance'].set()
+
                         # Process control
                         Timer(period, start_time)
                         self.t_gui = time() - start_time
@@ -259,34 +308,66 @@ class Rover():
                 # Thread setting
                 period = 0.1
 		convert = 2*pi/60.0
+
+		try:
+			# Initialize SenseHat to save data
+			from sense_hat import SenseHat
+			self.sense = SenseHat()
+			self.sense.set_imu_config(False, True, True) # compass disabled
+			if isKalmanActive:
+				from filter import Filter
+				self.Kalman = Filter()
+
+			# Wheel slip detection on the four encoders
+			from slip import Slip, LEFT
+			self.slip = Slip(self.R, self.L)
+
+			# Columnar telemetry log, see logview.py
+			from telemetry import Writer, NAVIGATION
+			log = Writer('data.log', NAVIGATION)
+		except Exception as error:
+			# Reported by WaitReady, Guidance does not drive without Navigation
+			self.failed['navigation'] = error
+			raise
                 logging.debug("Starting")
-                Timer(self.init_time, start_time)
+                self.startup.Phase("navigation")
+                self.ready['navigation'].set()
 
                 while not self.exit:                    
                         start_time = time()
+                        self.jitter_nav.Tick()
 
                         if not self.GoTo:
 
                                 # TURN MODE
                                 if self.fsm == 'Turn' or self.fsm == 'Deviation' :
                                         if self.sens == 'Right':
-                                                omega_righ = -self.righ_omega_mes
-                                                omega_left = +self.left_omega_mes
+                                                sign_righ = -1.0
+                                                sign_left = +1.0
                                         else:
-                                                omega_righ = +self.righ_omega_mes
-                                                omega_left = -self.left_omega_mes
+                                                sign_righ = +1.0
+                                                sign_left = -1.0
 
                                 # RECUL MODE 
                                 elif self.fsm == 'Recul':
-                                        omega_righ = -self.righ_omega_mes
-                                        omega_left = -self.left_omega_mes
+                                        sign_righ = -1.0
+                                        sign_left = -1.0
                                 else :
-                                        omega_righ = +self.righ_omega_mes
-                                        omega_left = +self.left_omega_mes
+                                        sign_righ = +1.0
+                                        sign_left = +1.0
+
+				# SLIP DETECTION, slipping wheels are down-weighted in the odometry
+				wheels = [sign_left*w if isLeft else sign_righ*w for w, isLeft in zip(self.wheels_mes, LEFT)]
+				self.Wrate = -self.sense.get_gyroscope_raw()['z']
+				self.slip.Update(wheels, self.Wrate)
+				omega_righ, omega_left = self.slip.Odometry(wheels)
 
 				if isKalmanActive == False :
                                         dmoy = self.R*self.t_nav*(omega_righ + omega_left)*0.5*convert
                                 	temp = self.Wcurrent + self.R*self.t_nav*convert*(omega_righ-omega_left)/self.L
+					if self.slip.slipping.any():
+						# Wheel heading not trusted, use the gyro
+						temp = self.Wcurrent + self.t_nav*self.Wrate
                                		self.Wcurrent = Reset(temp) 
                                 	self.Xcurrent = self.Xcurrent + dmoy*cos(self.Wcurrent)
                                 	self.Ycurrent = self.Ycurrent + dmoy*sin(self.Wcurrent)
@@ -300,16 +381,18 @@ class Rover():
                                 	self.Ycurrent = self.Ycurrent + dmoy*sin(self.Wcurrent)
 
 				# SAVE IN A FILE
-                                yaw, pitch, roll = self.sense.get_orientation().values()
-                                ax, ay, az = self.sense.get_accelerometer_raw().values()
-                                fichier = open('data','a')
-                                fichier.write("%.3f,%.3f,%.4f,%.4f,%.4f,%.2f,%.4f,%.4f,%.4f,%.4f,%.4f,%.4f,%.2f,%.2f,%.4f,%.4f,%.4f\n" % ((time()-self.debut), self.t_nav, yaw, pitch, roll, self.sense.get_temperature(), ax, ay, az, self.Xcurrent, self.Ycurrent, self.Wcurrent, omega_righ, omega_left, self.Wshift, self.Wgyro, self.WcurrentOdo))
-                                fichier.close()
+                                # Read by key, the dict order is not the column order
+                                orientation = self.sense.get_orientation()
+                                yaw, pitch, roll = orientation['yaw'], orientation['pitch'], orientation['roll']
+                                acceleration = self.sense.get_accelerometer_raw()
+                                ax, ay, az = acceleration['x'], acceleration['y'], acceleration['z']
+                                log.Append(time(), self.t_nav, yaw, pitch, roll, self.sense.get_temperature(), ax, ay, az, self.Xcurrent, self.Ycurrent, self.Wcurrent, omega_righ, omega_left, self.Wshift, self.Wgyro, self.WcurrentOdo, *(wheels + list(self.slip.weights)))
         
                         # Process control
                         Timer(period, start_time)
                         self.t_nav = time() - start_time    
                 
+		log.Close()
                 logging.debug("Exiting")
 
 
@@ -317,103 +400,36 @@ class Rover():
                 start_time = time()             
 
                 # Init serial communication with Arduino 
-                arduino = Arduino(period = 0.1)
-                     
+                try:
+                        from uart import Arduino
+                        arduino = Arduino(period = 0.1)
+                except Exception as error:
+                        self.failed['control'] = error
+                        raise
+                self.startup.Phase("serial")
                 logging.debug("Starting")
-                Timer(self.init_time, start_time)
+                isFirstCommand = True
 
                 while not self.exit:
                         start_time = time()
                         
                         # Bidirectionnal link with Arduino
+                        if isFirstCommand and self.ready['guidance'].is_set():
+                                isFirstCommand = False
+                                self.startup.Phase("first command")
                         arduino.sendDatas(self.left_omega_ref, self.righ_omega_ref, self.modeFSM)
-                        self.left_omega_mes, self.righ_omega_mes, self.left_dist, self.righ_dist = arduino.getDatas()
+                        leftUp, rightUp, leftDw, rightDw, self.left_dist, self.righ_dist = arduino.getDatas()
+                        self.wheels_mes = [leftUp, rightUp, leftDw, rightDw]
+                        self.left_omega_mes = 0.5*(leftUp + leftDw)
+                        self.righ_omega_mes = 0.5*(rightUp + rightDw)
+
+                        # The Arduino is up once it answers
+                        if arduino.received and not self.ready['control'].is_set():
+                                self.startup.Phase("control")
+                                self.ready['control'].set()
 
                         # Process control
                         self.t_con = time() - start_time
                 
                 logging.debug("Exiting")
 
-
-def Vision():
-        start_time = time()
-        cv2.namedWindow('Vision', cv2.WINDOW_NORMAL)
-        cols = 640
-        rows = 480
-        camera = PiCamera()
-        camera.resolution = (cols, rows)
-        camera.framerate = 10
-        rawCapture = PiRGBArray(camera, size=(cols,rows))
-        period = 0.1
-        logging.debug("Starting")
-        sleep(4.9)
-                
-        for frame in camera.capture_continuous(rawCapture, format = "bgr", use_video_port = True):
-                start_time = time()
-
-                # Image processing                      
-                img = frame.array
-                img = cv2.medianBlur(img,5)
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, 1, 20,
-                                           param1 = 50, param2 = 30, minRadius = 0, maxRadius = 0)
-                print circles
-
-                #circles = np.uint16(np.around(circles))
-                #for i in circles[0,:]:
-                 #       cv2.circle(img,i[0],i[1],i[2],(0,255,0),2)
-                                
-                #blur = cv2.blur(img,(5,5))
-                #imageHSV = cv2.cvtColor(img, cv2.COLOR_GRAY2HSV)
-
-                # Thresholding
-                min_red = np.array((0. ,125. ,125. ))
-                max_red = np.array((7. ,255. ,255. ))
-                min_red2 = np.array((170. ,125. ,125. ))
-                max_red2 = np.array((180. ,255. ,255. ))
-                imgThresh = cv2.inRange(imageHSV, min_red, max_red)
-                imgThresh2= cv2.inRange(imageHSV, min_red2, max_red2)
-                imgThreshT=cv2.bitwise_or(imgThresh,imgThresh2)
-
-                # Filter
-                kernel = np.ones((7,7),np.uint8)
-                closing = cv2.morphologyEx(imgThreshT, cv2.MORPH_CLOSE, kernel)
-                image, contours,hier = cv2.findContours(closing,cv2.RETR_LIST,cv2.CHAIN_APPROX_NONE)
-
-                cnt_filt=[]                
-                for cnt in contours:
-                        CurrAera=cv2.contourArea(cnt)
-                        if CurrAera>1500 :
-                                hull = cv2.approxPolyDP(cnt,0.02*cv2.arcLength(cnt,True),True)
-                                approx = cv2.convexHull(cnt)
-                                if not cv2.isContourConvex(hull): # and len(hull)<=136:
-                                        m = cv2.moments(hull)
-                                        n = cv2.moments(approx)
-                                        if m['m00'] !=0:
-                                                barycentre=(int(m['m10']/m['m00']),int(m['m01']/m['m00']))
-                                                cv2.drawContours(img,[hull],0,(0,0,255),2)
-                                                barycentre_2=(int(n['m10']/n['m00']),int(n['m01']/n['m00']))
-                                                cv2.circle(img,barycentre_2,4,(255,0,255),-1)
-
-                #CREATE COMPOSED IMAGE
-                rows,cols,channels = img.shape
-                compoImage = np.zeros((rows,2*cols,3), np.uint8)
-                compoImage[0:rows, 0:cols ] = img
-                # imgThreshTRGB = cv2.cvtColor ( imgThreshT, cv2.COLOR_GRAY2BGR );
-                compoImage[0:rows, cols:2*cols ] = img
-                
-                #CAPTURE VIDEO
-                cv2.imshow('Vision', compoImage)
-                key = cv2.waitKey(1)
-		rawCapture.truncate(0)
-		
-		# SORTIE
-		if key == 27:
-				camera.close()
-				break
-
-                sleep(0.1)
-                t_vis = time() - start_time 
-
-        cv2.destroyAllWindows()
-        logging.debug("Exiting")